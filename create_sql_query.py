@@ -2,14 +2,145 @@
 Generate an SQL query to retrieve the data needed to satify the user's request.
 To do so, this takes relevant documents and the user question as input.
 '''
+import functools
+import hashlib
+import os
+
 import pandas as pd
-from ctransformers import LLM
+from llama_cpp import Llama
 
 from generate_schema_documents import ColumnDoc
 
 FORBIDDEN_KEYWORDS = [
     "DROP TABLE", "DELETE FROM", "INSERT INTO", "UPDATE", "ALTER TABLE"]
 
+# Precompiled Aho-Corasick automaton so the forbidden-keyword check
+# scans the query once instead of once per keyword. Optional: without
+# pyahocorasick installed the check falls back to the plain loop.
+try:
+    import ahocorasick
+    _forbidden_automaton = ahocorasick.Automaton()
+    for _keyword in FORBIDDEN_KEYWORDS:
+        _forbidden_automaton.add_word(_keyword, _keyword)
+    _forbidden_automaton.make_automaton()
+except ImportError:
+    _forbidden_automaton = None
+
+# Q4_K_M requantized with an importance matrix calibrated on SQL-schema
+# prompts; see the README for the llama-imatrix / llama-quantize commands
+MODEL_PATH = 'sqlcoder-7b-2-Q4_K_M-imat.gguf'
+
+
+def get_n_threads() -> int:
+    '''
+    Picks the thread count from the cores this process may actually run
+    on, rather than the conservative library default. Falls back to the
+    total core count on platforms without sched_getaffinity.
+
+    :return: The number of threads to use for inference
+    :rtype: int
+    '''
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count()
+
+
+def get_n_gpu_layers() -> int:
+    '''
+    Decides how many transformer layers to offload to the GPU. All
+    layers are offloaded when CUDA is available; set SQLCODER_DEVICE=cpu
+    to force the pure CPU path (or SQLCODER_DEVICE=gpu to force
+    offloading without the torch check).
+
+    :return: The n_gpu_layers value for the Llama constructor
+    :rtype: int
+    '''
+    device = os.environ.get('SQLCODER_DEVICE', '').lower()
+    if device == 'cpu':
+        return 0
+    if device == 'gpu':
+        return -1
+    try:
+        import torch
+        return -1 if torch.cuda.is_available() else 0
+    except ImportError:
+        return 0
+
+
+@functools.lru_cache(maxsize=1)
+def load_model(model_path: str = MODEL_PATH, n_ctx: int = 4096) -> Llama:
+    '''
+    Load the NL-to-SQL model through llama.cpp, which ships tuned
+    AVX2/AVX-512/NEON kernels for the quantized weight blocks.
+    Build llama-cpp-python against the native instruction set, e.g.:
+    CMAKE_ARGS="-DGGML_NATIVE=on -DGGML_OPENMP=on" \
+        pip install --no-binary llama-cpp-python llama-cpp-python
+
+    Cached so repeated imports/callers share one instance; with
+    use_mmap the weight pages are also shared across processes by the
+    OS page cache, so extra workers cost ~100MB instead of 4GB.
+
+    :param model_path: Path to the GGUF model file
+    :type model_path: str
+    :param n_ctx: The context window size in tokens
+    :type n_ctx: int
+    :return: The loaded model
+    :rtype: Llama
+    '''
+    n_threads = get_n_threads()
+    model = Llama(
+        model_path=model_path,
+        n_gpu_layers=get_n_gpu_layers(),
+        n_ctx=n_ctx,
+        n_threads=n_threads,
+        n_threads_batch=n_threads,
+        n_batch=2048,
+        n_ubatch=512,
+        logits_all=False,
+        use_mmap=True,
+        use_mlock=True)
+
+    return model
+
+
+def benchmark_load_settings(
+        model_path: str = MODEL_PATH,
+        thread_counts: list[int] = None) -> dict[int, float]:
+    '''
+    One-shot microbenchmark to pick the best thread count on this host.
+    Times a short schema-sized prefill for each candidate thread count
+    and returns the seconds each took.
+
+    :param model_path: Path to the GGUF model file
+    :type model_path: str
+    :param thread_counts: The thread counts to try (default: powers of
+        two up to the available core count)
+    :type thread_counts: list[int]
+    :return: Mapping of thread count to prefill seconds
+    :rtype: dict[int, float]
+    '''
+    import time
+
+    if thread_counts is None:
+        max_threads = get_n_threads()
+        thread_counts = [
+            n for n in (1, 2, 4, 8, 16, 32, 64) if n <= max_threads]
+
+    prompt = 'SELECT * FROM benchmark ' * 64
+    timings = {}
+    for n_threads in thread_counts:
+        model = Llama(
+            model_path=model_path, n_ctx=4096, n_threads=n_threads,
+            n_threads_batch=n_threads, n_batch=2048, n_ubatch=512,
+            use_mmap=True, verbose=False)
+        start = time.perf_counter()
+        model.eval(model.tokenize(prompt.encode()))
+        timings[n_threads] = time.perf_counter() - start
+        print(f'{n_threads} threads: {timings[n_threads]:.2f}s')
+
+    return timings
+
 def get_documents_text(
         documents: pd.DataFrame) -> str:
     '''
@@ -19,11 +150,10 @@ def get_documents_text(
     :return: The combined context string
     :rtype: str
     '''
-    context_string = ''
-    for _, document in documents.iterrows():
-        context_string += f'[DOCUMENT_START]\n{document.text}[DOCUMENT_END]\n\n'
+    texts = documents['text'].to_numpy()
 
-    return context_string
+    return ''.join(
+        f'[DOCUMENT_START]\n{text}[DOCUMENT_END]\n\n' for text in texts)
 
 
 def extract_table_descriptions(
@@ -40,63 +170,238 @@ def extract_table_descriptions(
     '''
     table_descriptions = ''
 
-    # Store the descriptions of retrieved tables 
-    existing_tables = sql_context_df[
-        sql_context_df['doc_type']=='table']['table'].unique()
+    # Index documents by doc_id for O(1) lookup per table
+    doc_by_id = {document.doc_id: document for document in documents}
+
+    # Split the context by doc_type once instead of re-filtering
+    context_by_doc_type = dict(iter(sql_context_df.groupby('doc_type')))
+
+    # Store the descriptions of retrieved tables
+    table_sql_context = context_by_doc_type.get('table')
+    if table_sql_context is not None:
+        existing_tables = set(table_sql_context['table'].unique())
+    else:
+        existing_tables = set()
 
     # Collect descriptions for each table with a column in context
-    col_sql_context = sql_context_df[sql_context_df['doc_type']=='column']
+    col_sql_context = context_by_doc_type.get('column')
+    if col_sql_context is None:
+        return table_descriptions
     for table_name in col_sql_context['table'].unique():
         if table_name in existing_tables:
             continue
         print(f'--- Columns for table: {table_name} ---')
-        for document in documents:
-            if document.doc_id == f'table:{table_name}':
-                table_descriptions += f'[DOCUMENT_START]\n{document.text}[DOCUMENT_END]\n\n'
-                break
-    
+        document = doc_by_id.get(f'table:{table_name}')
+        if document is not None:
+            table_descriptions += f'[DOCUMENT_START]\n{document.text}[DOCUMENT_END]\n\n'
+
     return table_descriptions
 
 
+# Static prompt prefix, shared by every question asked against the same
+# schema. Keeping the question out of this part lets its KV states be
+# cached and reused across calls.
+PROMPT_PREFIX_TEMPLATE = """
+    ### Task
+    Generate a SQL query to answer the user question given below.
+
+    ### Instructions
+    - If you cannot answer the question with the available database schema, return 'I do not know'
+    - Use SQLite dialect.
+    - Do not alter anything in the SQL database. Only retrieve data. Do
+    not include any forbidden keywords such as {forbidden_keywords}.
+
+    ### Database Schema
+    The query will run on a database with the following schema:
+    [START_SCHEMA]
+    {schema}
+    [END_SCHEMA]
+
+    ### Answer
+    Given the database schema, the question"""
+
+# Static pieces of the per-question suffix; only the question between
+# them varies, so these are tokenized once per model instead of per call
+PROMPT_SUFFIX_OPEN = " [QUESTION]"
+PROMPT_SUFFIX_CLOSE = """[/QUESTION] is answered with the following SQL query:
+    [SQL]
+    """
+
+# KV states for already-seen prompt prefixes, keyed by schema hash
+_prefix_state_cache = {}
+
+# Token ids of the static suffix pieces, keyed by model instance
+_suffix_token_cache = {}
+
+# Token id of the SQL statement terminator, keyed by model instance
+_semicolon_token_cache = {}
+
+
+def tokenize_suffix(question: str, model: Llama) -> list[int]:
+    '''
+    Tokenizes the per-question suffix. The static chunks around the
+    question are tokenized once per model and reused, so each call only
+    tokenizes the question itself.
+
+    :param question: The user question
+    :type question: str
+    :param model: The SQL-query-generation model
+    :type model: Llama
+    :return: The token ids of the full suffix
+    :rtype: list[int]
+    '''
+    static_ids = _suffix_token_cache.get(id(model))
+    if static_ids is None:
+        static_ids = (
+            model.tokenize(PROMPT_SUFFIX_OPEN.encode(), add_bos=False),
+            model.tokenize(PROMPT_SUFFIX_CLOSE.encode(), add_bos=False))
+        _suffix_token_cache[id(model)] = static_ids
+
+    open_ids, close_ids = static_ids
+    question_ids = model.tokenize(question.encode(), add_bos=False)
+
+    return open_ids + question_ids + close_ids
+
+
+def evaluate_prompt_prefix(model: Llama, retrieved_docs: str) -> None:
+    '''
+    Puts the model in the state reached after processing the static
+    instruction + schema prefix. The first call per schema pays the full
+    prefill; later calls restore the saved KV states so only the short
+    question suffix still needs processing.
+
+    :param model: The SQL-query-generation model
+    :type model: Llama
+    :param retrieved_docs: The schema context string
+    :type retrieved_docs: str
+    '''
+    schema_hash = hashlib.blake2b(retrieved_docs.encode()).hexdigest()
+    state = _prefix_state_cache.get(schema_hash)
+    if state is not None:
+        model.load_state(state)
+        return
+
+    prefix = PROMPT_PREFIX_TEMPLATE.format(
+        schema=retrieved_docs, forbidden_keywords=FORBIDDEN_KEYWORDS)
+    model.reset()
+    model.eval(model.tokenize(prefix.encode()))
+    _prefix_state_cache[schema_hash] = model.save_state()
+
+
+def decode_sql_suffix(question: str, model: Llama) -> str:
+    '''
+    Evaluates the per-question suffix and decodes the SQL answer. The
+    model must already hold the KV states of the prompt prefix (see
+    evaluate_prompt_prefix).
+
+    :param question: The user question
+    :type question: str
+    :param model: The SQL-query-generation model
+    :type model: Llama
+    :return: The generated SQL query
+    :rtype: str
+    '''
+    model.eval(tokenize_suffix(question, model))
+
+    semicolon_id = _semicolon_token_cache.get(id(model))
+    if semicolon_id is None:
+        semicolon_id = model.tokenize(b';', add_bos=False)[-1]
+        _semicolon_token_cache[id(model)] = semicolon_id
+
+    response = ''
+    for _ in range(400):
+        # Greedy, deterministic sampling: a single argmax over the
+        # logits, with the top-k sort and repeat-penalty scan disabled
+        token = model.sample(
+            temp=0.0, top_k=1, top_p=1.0, repeat_penalty=1.0)
+        # Stop on the terminator token before decoding it to text
+        if token == model.token_eos() or token == semicolon_id:
+            break
+        model.eval([token])
+        response += model.detokenize([token]).decode('utf-8', errors='ignore')
+        if response.endswith('###'):
+            response = response[:-3]
+            break
+
+    return response
+
+
+# Retrieved-docs text keyed by schema hash, so cached generations are
+# keyed on the short hash instead of the multi-KB context string
+_schema_text_by_hash = {}
+
+
+@functools.lru_cache(maxsize=512)
+def _generate_sql_cached(
+        question: str, schema_hash: str, model: Llama) -> str:
+    '''
+    Memoized inner generation; repeated (question, schema) pairs return
+    the cached SQL without touching the model.
+    '''
+    retrieved_docs = _schema_text_by_hash[schema_hash]
+    evaluate_prompt_prefix(model, retrieved_docs)
+    print('Generating SQL...')
+
+    return decode_sql_suffix(question, model)
+
+
+def clear_sql_cache() -> None:
+    '''
+    Drops memoized generations, e.g. after a schema update.
+    '''
+    _generate_sql_cached.cache_clear()
+    _schema_text_by_hash.clear()
+
+
 def generate_sql_cpu(
-        question: str, retrieved_docs: str, model: LLM) -> str:
+        question: str, retrieved_docs: str, model: Llama) -> str:
     '''
     Generates an SQL Query based on the user question and top documents
     '''
-    
-    prompt = """
-        ### Task
-        Generate a SQL query to answer [QUESTION]{question}[/QUESTION]
-
-        ### Instructions
-        - If you cannot answer the question with the available database schema, return 'I do not know'
-        - Use SQLite dialect.
-        - Do not alter anything in the SQL database. Only retrieve data. Do 
-        not include any forbidden keywords such as {forbidden_keywords}.
-
-        ### Database Schema
-        The query will run on a database with the following schema:
-        [START_SCHEMA]
-        {schema}
-        [END_SCHEMA]
-
-        ### Answer
-        Given the database schema, the question [QUESTION]{question}[/QUESTION] is answered with the following SQL query:
-        [SQL]
-        """.format(question=question,
-                   schema=retrieved_docs, forbidden_keywords=FORBIDDEN_KEYWORDS)   
-    print('Generating SQL...')
+    schema_hash = hashlib.blake2b(retrieved_docs.encode()).hexdigest()
+    _schema_text_by_hash[schema_hash] = retrieved_docs
 
-    response = model(prompt, max_new_tokens=400, stop=["###", ";"]) 
-    
-    return response
+    return _generate_sql_cached(question, schema_hash, model)
+
+
+def generate_sql_cpu_batch(
+        questions: list[str], retrieved_docs: str, model: Llama) -> list[str]:
+    '''
+    Generates SQL Queries for a batch of user questions that share the
+    same retrieved schema context. The schema prefix is prefilled once
+    and its KV states are restored for each question, so N questions pay
+    for one prefix prefill instead of N.
+
+    :param questions: The user questions
+    :type questions: list[str]
+    :param retrieved_docs: The shared schema context string
+    :type retrieved_docs: str
+    :param model: The SQL-query-generation model
+    :type model: Llama
+    :return: One generated SQL query per question
+    :rtype: list[str]
+    '''
+    evaluate_prompt_prefix(model, retrieved_docs)
+    prefix_state = model.save_state()
+    print(f'Generating SQL for {len(questions)} questions...')
+
+    responses = []
+    for question in questions:
+        model.load_state(prefix_state)
+        responses.append(decode_sql_suffix(question, model))
+
+    return responses
 
 
 ############################
 ### Validating SQL Query ###
 ############################
 import sqlite3
-import re
+
+# Precomputed ASCII case-fold table; branch-free vs the locale-aware
+# str.upper() path, and the keywords are plain ASCII anyway
+_UPPER_TABLE = str.maketrans(
+    'abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
 
 def check_forbidden_keywords(sql_query: str) -> tuple[bool, str]:
     '''
@@ -107,9 +412,13 @@ def check_forbidden_keywords(sql_query: str) -> tuple[bool, str]:
     :return: Description
     :rtype: tuple[bool, str]
     '''
-    query_upper = sql_query.upper()
-    found_forbidden = [
-        term for term in FORBIDDEN_KEYWORDS if term in query_upper]
+    query_upper = sql_query.translate(_UPPER_TABLE)
+    if _forbidden_automaton is not None:
+        found_forbidden = sorted(
+            {term for _, term in _forbidden_automaton.iter(query_upper)})
+    else:
+        found_forbidden = [
+            term for term in FORBIDDEN_KEYWORDS if term in query_upper]
     if found_forbidden:
         return False, f"query has forbidden keywords {', '.join(found_forbidden)}"
     